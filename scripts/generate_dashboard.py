@@ -3,49 +3,150 @@ CI Status Dashboard Generator
 Queries all repos in algojj org, gets latest workflow status, generates static HTML.
 """
 
+import gzip
 import html as html_mod
 import json
 import os
 import sys
 import requests
+from collections import Counter
+from requests.adapters import HTTPAdapter
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
+try:
+    import orjson
+except ImportError:  # optional speedup, falls back to stdlib json
+    orjson = None
+
 GH_TOKEN = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
 ORG_NAME = os.environ.get("ORG_NAME", "algojj")
 API = "https://api.github.com"
 HEADERS = {"Authorization": f"token {GH_TOKEN}", "Accept": "application/vnd.github+json"}
-AR_TZ = timezone(timedelta(hours=-3))
+AR_OFFSET = timedelta(hours=-3)  # Argentina has no DST
+AR_TZ = timezone(AR_OFFSET)
+# Sort: failing > running > cancelled > no_ci > unknown > success
+STATUS_ORDER = {"failure": 0, "running": 1, "cancelled": 2, "no_ci": 3, "unknown": 4, "success": 5}
+MAX_WORKERS = 16
+REPOS_PER_PAGE = 100
+OUT_DIR = "/tmp/dashboard"
+OUT_BUFFER = 1 << 20  # large enough that each output file goes out in ~one write(2)
+ETAG_CACHE_PATH = os.environ.get("ETAG_CACHE_PATH", f"{OUT_DIR}/etag_cache.json")
+etag_cache = {}
+etag_used = set()  # keys read or written this run; only these are saved
+
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32, pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                      raise_on_status=False, respect_retry_after_header=False),
+))
+
+
+def load_etag_cache():
+    try:
+        with open(ETAG_CACHE_PATH) as f:
+            etag_cache.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+
+def save_etag_cache():
+    os.makedirs(os.path.dirname(ETAG_CACHE_PATH), exist_ok=True)
+    with open(ETAG_CACHE_PATH, "w") as f:
+        json.dump({k: v for k, v in etag_cache.items() if k in etag_used}, f)
+
+
+def decode_json(resp):
+    return orjson.loads(resp.content) if orjson else resp.json()
+
+
+def api_get(url, params=None, headers=None):
+    resp = SESSION.get(url, headers=headers, params=params or {}, timeout=30)
+    if resp.status_code in (403, 429):
+        # Primary limit: remaining hits 0; secondary limit: Retry-After is set
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            print(f"Rate limited. Resets at {resp.headers.get('X-RateLimit-Reset')}")
+            sys.exit(1)
+        if "Retry-After" in resp.headers:
+            print(f"Rate limited (secondary limit). Retry after {resp.headers['Retry-After']}s")
+            sys.exit(1)
+    return resp
 
 
-def api_get(url, params=None):
-    resp = requests.get(url, headers=HEADERS, params=params or {}, timeout=30)
-    if resp.status_code == 403 and "rate limit" in resp.text.lower():
-        print(f"Rate limited. Headers: {resp.headers.get('X-RateLimit-Remaining')}")
-        sys.exit(1)
-    return resp
+def get_repo_page(page):
+    """Return (repos, last_page) for one page of the org listing."""
+    resp = api_get(f"{API}/orgs/{ORG_NAME}/repos", {"per_page": REPOS_PER_PAGE, "page": page, "type": "all"})
+    if resp.status_code != 200:
+        print(f"Error listing repos: {resp.status_code} {resp.text[:200]}")
+        return None, page
+    if "last" in resp.links:
+        last_page = int(parse_qs(urlparse(resp.links["last"]["url"]).query)["page"][0])
+    else:
+        last_page = page + 1 if "next" in resp.links else page
+    return decode_json(resp), last_page
 
 
 def get_all_repos():
     repos = []
-    page = 1
-    while True:
-        resp = api_get(f"{API}/orgs/{ORG_NAME}/repos", {"per_page": 100, "page": page, "type": "all"})
-        if resp.status_code != 200:
-            print(f"Error listing repos: {resp.status_code} {resp.text[:200]}")
-            break
-        data = resp.json()
-        if not data:
-            break
-        repos.extend(data)
-        page += 1
+    data, last_page = get_repo_page(1)
+    if not data:
+        return repos
+    repos.extend(data)
+    fetched = 1
+    # Link rel="last" on page 1 gives the page count, so fetch the rest in parallel
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        while last_page > fetched:
+            pages = range(fetched + 1, last_page + 1)
+            for data, last_page in ex.map(get_repo_page, pages):
+                if not data:
+                    return repos
+                repos.extend(data)
+            fetched = pages[-1]
     return repos
 
 
-def get_latest_run(repo_name):
-    resp = api_get(f"{API}/repos/{ORG_NAME}/{repo_name}/actions/runs", {"per_page": 1})
-    if resp.status_code != 200 or not resp.json().get("workflow_runs"):
+def api_get_cached(url, params=None):
+    """GET a JSON body, revalidating with If-None-Match so unchanged resources cost a 304."""
+    key = f"{url}?{urlencode(params or {})}"
+    etag_used.add(key)
+    cached = etag_cache.get(key)
+    resp = api_get(url, params, {"If-None-Match": cached["etag"]} if cached else None)
+    if resp.status_code == 304 and cached:
+        return cached["body"]
+    if resp.status_code != 200:
         return None
-    return resp.json()["workflow_runs"][0]
+    body = decode_json(resp)
+    if resp.headers.get("ETag"):
+        etag_cache[key] = {"etag": resp.headers["ETag"], "body": body}
+    return body
+
+
+def get_latest_run(repo_name):
+    data = api_get_cached(f"{API}/repos/{ORG_NAME}/{repo_name}/actions/runs",
+                          {"per_page": 1, "exclude_pull_requests": "true"})
+    runs = data.get("workflow_runs") if data else None
+    return runs[0] if runs else None
+
+
+def parse_gh_ts(s):
+    """Parse GitHub's fixed-shape YYYY-MM-DDTHH:MM:SSZ timestamps by slicing."""
+    if len(s) == 20 and s[19] == "Z":
+        try:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                            int(s[11:13]), int(s[14:16]), int(s[17:19]), tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+
+def format_ar_minute(dt):
+    """Format a UTC datetime as Argentina local "YYYY-MM-DD HH:MM"."""
+    t = dt + AR_OFFSET
+    return f"{t.year:04d}-{t.month:02d}-{t.day:02d} {t.hour:02d}:{t.minute:02d}"
 
 
 def format_duration(seconds):
@@ -75,11 +176,13 @@ def get_status_info(run):
 
 
 def build_repo_data(repos):
+    names = [repo["name"] for repo in repos]
+    print(f"  Checking {len(names)} repos ({MAX_WORKERS} at a time)...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        runs = list(ex.map(get_latest_run, names))
+
     results = []
-    for repo in repos:
-        name = repo["name"]
-        print(f"  Checking {name}...")
-        run = get_latest_run(name)
+    for repo, name, run in zip(repos, names, runs):
         status_key, status_label, status_icon = get_status_info(run)
 
         entry = {
@@ -92,84 +195,44 @@ def build_repo_data(repos):
         }
 
         if run:
-            created = datetime.fromisoformat(run["created_at"].replace("Z", "+00:00"))
-            updated = datetime.fromisoformat(run["updated_at"].replace("Z", "+00:00"))
-            duration_s = int((updated - created).total_seconds())
+            created = parse_gh_ts(run["created_at"])
+            updated = parse_gh_ts(run["updated_at"])
+            duration_s = int(updated.timestamp() - created.timestamp())
 
             entry.update({
                 "run_url": run["html_url"],
                 "run_name": run.get("name", run.get("display_title", "")),
                 "branch": run.get("head_branch", ""),
                 "commit_msg": (run.get("display_title") or run.get("head_commit", {}).get("message", ""))[:80],
-                "commit_date": created.astimezone(AR_TZ).strftime("%Y-%m-%d %H:%M"),
+                "commit_date": format_ar_minute(created),
                 "duration": format_duration(duration_s),
                 "workflow": run.get("name", ""),
             })
         results.append(entry)
 
-    # Sort: failing > running > cancelled > no_ci > unknown > success
-    order = {"failure": 0, "running": 1, "cancelled": 2, "no_ci": 3, "unknown": 4, "success": 5}
-    results.sort(key=lambda r: (order.get(r["status_key"], 99), r["name"]))
+    results.sort(key=lambda r: (STATUS_ORDER.get(r["status_key"], 99), r["name"]))
     return results
 
 
 def count_statuses(data):
-    counts = {}
-    for r in data:
-        k = r["status_key"]
-        counts[k] = counts.get(k, 0) + 1
-    return counts
+    return Counter(r["status_key"] for r in data)
 
 
-def generate_html(data, counts, timestamp):
-    total = len(data)
-    failing = counts.get("failure", 0)
-    passing = counts.get("success", 0)
-    running = counts.get("running", 0)
-    no_ci = counts.get("no_ci", 0)
-    other = total - failing - passing - running - no_ci
-
-    health = "ALL GREEN" if failing == 0 else f"{failing} FAILING"
-    health_color = "#4caf50" if failing == 0 else "#f44336"
-
-    rows = ""
-    for r in data:
-        status_class = r["status_key"]
-        run_link = ""
-        commit_info = ""
-        duration = ""
-        branch = ""
-
-        if r.get("run_url"):
-            run_link = f'<a href="{r["run_url"]}" target="_blank" class="run-link">View Run</a>'
-            commit_info = f'<span class="commit-msg">{r.get("commit_msg", "")}</span><br><span class="commit-date">{r.get("commit_date", "")}</span>'
-            duration = r.get("duration", "")
-            branch = r.get("branch", "")
-
-        # Build copy-to-clipboard text for failed/non-success items
-        copy_btn = ""
-        if r["status_key"] in ("failure", "cancelled") and r.get("run_url"):
-            copy_text = (
-                f'El pipeline "{r.get("workflow", "")}" fallo en el repo algojj/{r["name"]}, '
-                f'branch: {r.get("branch", "?")}, '
-                f'commit: "{r.get("commit_msg", "")}" ({r.get("commit_date", "")}). '
-                f'Run: {r.get("run_url", "")} — '
-                f'Por favor revisa los logs del workflow y decime que paso.'
-            )
-            safe_text = html_mod.escape(copy_text, quote=True)
-            copy_btn = f'<button class="copy-btn" data-copy="{safe_text}" title="Copy for Claude Code">📋</button>'
-
-        rows += f"""
+ROW_TMPL = """
         <tr class="status-{status_class}">
-            <td class="status-cell"><span class="status-icon">{r["status_icon"]}</span> {r["status_label"]}</td>
-            <td><a href="{r["url"]}" target="_blank" class="repo-link">{r["name"]}</a>{"  🔒" if r.get("private") else ""}</td>
+            <td class="status-cell"><span class="status-icon">{status_icon}</span> {status_label}</td>
+            <td><a href="{url}" target="_blank" class="repo-link">{name}</a>{lock}</td>
             <td class="branch-cell">{branch}</td>
             <td class="commit-cell">{commit_info}</td>
             <td class="duration-cell">{duration}</td>
             <td class="action-cell">{run_link} {copy_btn}</td>
         </tr>"""
 
-    html = f"""<!DOCTYPE html>
+ESCAPED_FIELDS = ("name", "url", "status_label", "run_url", "branch", "commit_msg", "commit_date")
+
+OTHER_STAT_TMPL = "<span class='stat stat-noci'>⏹️ {other} other</span>"
+
+PAGE_HEAD_TMPL = """<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -353,7 +416,7 @@ tr:hover {{ background: #161b2288; }}
         <span class="stat stat-fail">❌ {failing} failing</span>
         <span class="stat stat-run">🔄 {running} running</span>
         <span class="stat stat-noci">⚠️ {no_ci} sin CI</span>
-        {"<span class='stat stat-noci'>⏹️ " + str(other) + " other</span>" if other > 0 else ""}
+        {other_stat}
     </div>
     <div class="timestamp">Last updated: {timestamp} (Argentina) — Refreshes every 15 min (Mon-Fri 8am-9pm ART)</div>
 </div>
@@ -370,25 +433,99 @@ tr:hover {{ background: #161b2288; }}
     </tr>
 </thead>
 <tbody>
-{rows}
+"""
+
+PAGE_TAIL = """
 </tbody>
 </table>
 </div>
 <script>
-document.querySelectorAll('.copy-btn').forEach(function(btn) {{
-    btn.addEventListener('click', function() {{
+document.querySelectorAll('.copy-btn').forEach(function(btn) {
+    btn.addEventListener('click', function() {
         var text = this.getAttribute('data-copy');
-        navigator.clipboard.writeText(text).then(function() {{
+        navigator.clipboard.writeText(text).then(function() {
             btn.textContent = '✅';
             btn.classList.add('copied');
-            setTimeout(function() {{ btn.textContent = '📋'; btn.classList.remove('copied'); }}, 2000);
-        }});
-    }});
-}});
+            setTimeout(function() { btn.textContent = '📋'; btn.classList.remove('copied'); }, 2000);
+        });
+    });
+});
 </script>
 </body>
 </html>"""
-    return html
+
+
+def row_context(r):
+    # Escape every API-sourced string once; the templates only see escaped values
+    h = {k: html_mod.escape(r.get(k) or "", quote=True) for k in ESCAPED_FIELDS}
+    run_link = ""
+    commit_info = ""
+    duration = ""
+    branch = ""
+
+    if r.get("run_url"):
+        run_link = f'<a href="{h["run_url"]}" target="_blank" class="run-link">View Run</a>'
+        commit_info = f'<span class="commit-msg">{h["commit_msg"]}</span><br><span class="commit-date">{h["commit_date"]}</span>'
+        duration = r.get("duration", "")
+        branch = h["branch"]
+
+    # Build copy-to-clipboard text for failed/non-success items
+    copy_btn = ""
+    if r["status_key"] in ("failure", "cancelled") and r.get("run_url"):
+        copy_text = (
+            f'El pipeline "{r.get("workflow", "")}" fallo en el repo algojj/{r["name"]}, '
+            f'branch: {r.get("branch", "?")}, '
+            f'commit: "{r.get("commit_msg", "")}" ({r.get("commit_date", "")}). '
+            f'Run: {r.get("run_url", "")} — '
+            f'Por favor revisa los logs del workflow y decime que paso.'
+        )
+        safe_text = html_mod.escape(copy_text, quote=True)
+        copy_btn = f'<button class="copy-btn" data-copy="{safe_text}" title="Copy for Claude Code">📋</button>'
+
+    return {
+        "status_class": r["status_key"],
+        "status_icon": r["status_icon"],
+        "status_label": h["status_label"],
+        "url": h["url"],
+        "name": h["name"],
+        "lock": "  🔒" if r.get("private") else "",
+        "branch": branch,
+        "commit_info": commit_info,
+        "duration": duration,
+        "run_link": run_link,
+        "copy_btn": copy_btn,
+    }
+
+
+def tee(*outs):
+    def write(chunk):
+        for out in outs:
+            out.write(chunk)
+    return write
+
+
+def stream_html(write, data, counts, timestamp):
+    total = len(data)
+    failing = counts.get("failure", 0)
+    passing = counts.get("success", 0)
+    running = counts.get("running", 0)
+    no_ci = counts.get("no_ci", 0)
+    other = total - failing - passing - running - no_ci
+
+    write(PAGE_HEAD_TMPL.format_map({
+        "health": "ALL GREEN" if failing == 0 else f"{failing} FAILING",
+        "health_color": "#4caf50" if failing == 0 else "#f44336",
+        "total": total,
+        "passing": passing,
+        "failing": failing,
+        "running": running,
+        "no_ci": no_ci,
+        "other_stat": OTHER_STAT_TMPL.format(other=other) if other > 0 else "",
+        "timestamp": timestamp,
+    }))
+    for r in data:
+        write(ROW_TMPL.format_map(row_context(r)))
+    write(PAGE_TAIL)
 
 
 def main():
@@ -396,6 +533,7 @@ def main():
         print("ERROR: GH_TOKEN or GITHUB_TOKEN not set")
         sys.exit(1)
 
+    load_etag_cache()
     print(f"Fetching repos for org '{ORG_NAME}'...")
     repos = get_all_repos()
     print(f"Found {len(repos)} repos")
@@ -407,15 +545,20 @@ def main():
     now_ar = datetime.now(AR_TZ)
     timestamp = now_ar.strftime("%Y-%m-%d %H:%M:%S")
 
-    html = generate_html(data, counts, timestamp)
-
-    os.makedirs("/tmp/dashboard", exist_ok=True)
-    with open("/tmp/dashboard/index.html", "w") as f:
-        f.write(html)
-
-    with open("/tmp/dashboard/status.json", "w") as f:
-        json.dump({"timestamp": timestamp, "total": len(data), "counts": counts,
-                    "repos": [{k: v for k, v in r.items()} for r in data]}, f, indent=2)
+    os.makedirs(OUT_DIR, exist_ok=True)
+    # Write index.html and a pre-compressed index.html.gz in the same pass
+    with open(f"{OUT_DIR}/index.html", "w", buffering=OUT_BUFFER) as f, \
+            gzip.open(f"{OUT_DIR}/index.html.gz", "wt", encoding="utf-8", compresslevel=6) as gz:
+        stream_html(tee(f, gz), data, counts, timestamp)
+
+    status = {"timestamp": timestamp, "total": len(data), "counts": counts, "repos": data}
+    if orjson:
+        with open(f"{OUT_DIR}/status.json", "wb", buffering=OUT_BUFFER) as f:
+            f.write(orjson.dumps(status, option=orjson.OPT_INDENT_2))
+    else:
+        with open(f"{OUT_DIR}/status.json", "w", buffering=OUT_BUFFER) as f:
+            json.dump(status, f, indent=2)
+    save_etag_cache()
 
     print(f"\nDashboard generated: {len(data)} repos")
     for k, v in sorted(counts.items()):